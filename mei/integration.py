@@ -1,14 +1,73 @@
 """This module contains classes and functions pertaining to the NNFabrik integration."""
 
+import _compat_pickle
+import hashlib
+import inspect
+import json
 import pickle
+from collections import OrderedDict
+from functools import lru_cache
 
+import numpy as np
+import torch
 from nnfabrik.utility.nnf_helper import split_module_name, dynamic_import
 from nnfabrik.utility.dj_helpers import make_hash
 
 
+TORCH_ZIP_MAGIC = b"PK\x03\x04"
+
+# "weights_only" is only supported by torch.load in PyTorch 1.13 and newer
+_TORCH_LOAD_KWARGS = dict(map_location="cpu")
+if "weights_only" in inspect.signature(torch.load).parameters:
+    _TORCH_LOAD_KWARGS["weights_only"] = True
+
+_SAFE_GLOBALS = {
+    *(
+        ("builtins", name)
+        for name in ("dict", "list", "set", "frozenset", "tuple", "str", "bytes", "bytearray", "int", "float", "bool")
+    ),
+    ("collections", "OrderedDict"),
+    ("_codecs", "encode"),
+    ("numpy", "ndarray"),
+    ("numpy", "dtype"),
+    *(
+        (module, name)
+        for module in ("numpy.core.multiarray", "numpy._core.multiarray")
+        for name in ("_reconstruct", "scalar")
+    ),
+    ("numpy.core.numeric", "_frombuffer"),
+    ("numpy._core.numeric", "_frombuffer"),
+}
+
+
+class _RestrictedUnpickler(pickle.Unpickler):
+    """Unpickler that only reconstructs builtin containers and numpy arrays and refuses all other globals."""
+
+    def find_class(self, module, name):
+        # Pickles written with protocols 0 to 2 may use Python 2 names (e.g. "__builtin__.set"), which are translated
+        # the same way "pickle.Unpickler" does it when "fix_imports" is enabled before checking them
+        if (module, name) in _compat_pickle.NAME_MAPPING:
+            module, name = _compat_pickle.NAME_MAPPING[(module, name)]
+        elif module in _compat_pickle.IMPORT_MAPPING:
+            module = _compat_pickle.IMPORT_MAPPING[module]
+        if (module, name) not in _SAFE_GLOBALS:
+            raise pickle.UnpicklingError(f"Refusing to load global '{module}.{name}' from datafile")
+        return super().find_class(module, name)
+
+
 def load_pickled_data(path):
+    """Loads a datafile saved either with "torch.save" or with "pickle".
+
+    Files saved with "torch.save" are zip archives and are loaded with "torch.load", restricted to tensors and plain
+    Python containers on PyTorch versions that support it. All other files are treated as pickle files and may only
+    contain plain Python containers and numpy arrays.
+    """
     with open(path, "rb") as datafile:
-        data = pickle.load(datafile)
+        magic = datafile.read(len(TORCH_ZIP_MAGIC))
+        datafile.seek(0)
+        if magic == TORCH_ZIP_MAGIC:
+            return torch.load(datafile, **_TORCH_LOAD_KWARGS)
+        data = _RestrictedUnpickler(datafile).load()
     return data
 
 
@@ -16,8 +75,13 @@ def get_mappings(dataset_config, key, load_func=load_pickled_data):
     entities = []
     for datafile_path in dataset_config["datafiles"]:
         data = load_func(datafile_path)
-        for neuron_pos, neuron_id in enumerate(data["unit_indices"]):
-            entities.append(dict(key, neuron_id=neuron_id, neuron_position=neuron_pos, session_id=data["session_id"]))
+        neuron_ids = np.asarray(data["unit_indices"])
+        positions = np.arange(len(neuron_ids), dtype=np.int32)
+        prototype = dict(key, session_id=data["session_id"])
+        entities.extend(
+            {**prototype, "neuron_id": neuron_id, "neuron_position": neuron_pos}
+            for neuron_id, neuron_pos in zip(neuron_ids.tolist(), positions.tolist())
+        )
     return entities
 
 
@@ -26,44 +90,67 @@ def import_module(path):
 
 
 class ModelLoader:
-    def __init__(self, model_table, cache_size_limit=10):
+    __slots__ = ("model_table", "cache_size_limit", "compile_model", "cache", "_table", "_primary_key")
+
+    def __init__(self, model_table, cache_size_limit=10, compile_model=None):
         self.model_table = model_table
         self.cache_size_limit = cache_size_limit
-        self.cache = dict()
+        self.compile_model = compile_model
+        self.cache = OrderedDict()
+        self._table = self.model_table()
+        self._primary_key = tuple(self._table.primary_key)
 
     def load(self, key):
         if self.cache_size_limit == 0:
             return self._load_model(key)
-        if not self._is_cached(key):
-            self._cache_model(key)
-        return self._get_cached_model(key)
+        h = self._hash_trained_model_key(key)
+        if not self._is_cached(h):
+            self._cache_model(h, key)
+        return self._get_cached_model(h)
 
     def _load_model(self, key):
-        return self.model_table().load_model(key=key)
+        """Loads the model and, if a compile function was provided, compiles it once before it is cached."""
+        dataloaders, model = self._table.load_model(key=key)
+        if self.compile_model is not None:
+            model = self.compile_model(model)
+        return dataloaders, model
 
-    def _is_cached(self, key):
-        if self._hash_trained_model_key(key) in self.cache:
-            return True
-        return False
+    def _is_cached(self, h):
+        return h in self.cache
 
-    def _cache_model(self, key):
-        """Caches a model and makes sure the cache is not bigger than the specified limit."""
-        self.cache[self._hash_trained_model_key(key)] = self._load_model(key)
+    def _cache_model(self, h, key):
+        """Caches a model and makes sure the cache is not bigger than the specified limit.
+
+        If the cache is full the least recently used model is evicted.
+        """
+        self.cache[h] = self._load_model(key)
         if len(self.cache) > self.cache_size_limit:
-            del self.cache[list(self.cache)[0]]
+            self.cache.popitem(last=False)
 
-    def _get_cached_model(self, key):
-        return self.cache[self._hash_trained_model_key(key)]
+    def _get_cached_model(self, h):
+        self.cache.move_to_end(h)
+        return self.cache[h]
 
     def _hash_trained_model_key(self, key):
         """Creates a hash from the part of the key corresponding to the primary key of the trained model table."""
-        return make_hash({k: key[k] for k in self.model_table().primary_key})
+        return _hash_key_items(tuple((k, type(key[k]), key[k]) for k in self._primary_key))
+
+
+@lru_cache(maxsize=1024, typed=True)
+def _hash_key_items(key_items):
+    """Memoized "make_hash" of a key given as (name, type, value) items.
+
+    The types are part of the cache key because the cache would otherwise treat equal values of different types (e.g.
+    1, 1.0 and True) as the same key although "make_hash" creates different hashes for them.
+    """
+    return make_hash({k: v for k, _, v in key_items})
 
 
 def hash_list_of_dictionaries(list_of_dicts):
     """Creates a hash from a list of dictionaries that uniquely identifies the provided list of dictionaries.
 
-    The keys of every dictionary in the list and the list itself are sorted before creating the hash.
+    Every dictionary is hashed individually and the sorted hashes are concatenated and hashed again. This makes the
+    hash invariant to the order of the keys in each dictionary and to the order of the dictionaries in the list.
 
     Args:
         list_of_dicts: List of dictionaries.
@@ -71,6 +158,28 @@ def hash_list_of_dictionaries(list_of_dicts):
     Returns:
         A string representing the hash that uniquely identifies the provided list of dictionaries.
     """
-    dict_of_dicts = {make_hash(d): d for d in list_of_dicts}
-    sorted_list_of_dicts = [dict_of_dicts[h] for h in sorted(dict_of_dicts)]
-    return make_hash(sorted_list_of_dicts)
+    hashes = sorted(make_hash(d) for d in list_of_dicts)
+    return make_hash("".join(hashes))
+
+
+def fast_config_hash(config):
+    """Creates a 32 character hash from a JSON serializable configuration using BLAKE2b.
+
+    Keys are sorted before hashing so the hash is invariant to the key order of (nested) dictionaries. Note that the
+    resulting hashes differ from the ones created by "make_hash".
+
+    Args:
+        config: A (potentially nested) configuration object consisting only of JSON serializable types.
+
+    Returns:
+        A string representing the hash of the configuration.
+
+    Raises:
+        TypeError: The configuration contains objects that are not JSON serializable (e.g. numpy arrays or tensors) or
+            a dictionary whose keys can not be sorted.
+    """
+    try:
+        serialized = json.dumps(config, sort_keys=True).encode()
+    except TypeError as e:
+        raise TypeError(f"Can not hash configuration: {e}") from e
+    return hashlib.blake2b(serialized, digest_size=16).hexdigest()
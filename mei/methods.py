@@ -13,8 +13,8 @@ from .tracking import Tracker
 
 
 def get_input_dimensions(dataloaders, get_dims):
-    dataloaders_dimensions = list(get_dims(dataloaders["train"]).values())
-    return list(dataloaders_dimensions[0].values())[0]
+    first_dataloader_dimensions = next(iter(get_dims(dataloaders["train"]).values()))
+    return next(iter(first_dataloader_dimensions.values()))
 
 
 def gradient_ascent(
@@ -2,10 +2,11 @@
 
 from __future__ import annotations
 import os
+import secrets
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from typing import Callable, Iterable, Mapping, Optional, Tuple, Dict, Any
-from string import ascii_letters
-from random import choice
 
 import torch
 from torch.nn import Module
@@ -20,6 +21,23 @@ Key = Dict[str, Any]
 Dataloaders = Dict[str, DataLoader]
 
 
+def bulk_insert(table, rows: Iterable[Mapping], chunk_size: int = 1000) -> None:
+    """Inserts the rows into the table in chunks of at most "chunk_size" rows."""
+    rows = list(rows)
+    for start in range(0, len(rows), chunk_size):
+        table.insert(rows[start : start + chunk_size])
+
+
+def compile_model(model: Module) -> Module:
+    """Returns the model unchanged.
+
+    Compilation is opt-in: overwrite the "compile_model" class attribute of the MEI table, e.g. with
+    "staticmethod(torch.compile)", to compile the model used during MEI generation. The model is compiled once when it
+    is loaded, before its output is constrained to a single neuron, so that it is not recompiled for every neuron.
+    """
+    return model
+
+
 class TrainedEnsembleModelTemplateMixin:
     definition = """
     # contains ensemble ids
@@ -43,19 +61,28 @@ class TrainedEnsembleModelTemplateMixin:
     dataset_table = None
     trained_model_table = None
     ensemble_model_class = EnsembleModel
+    max_load_workers = 1
 
     insert1: Callable[[Mapping], None]
     __and__: Callable[[Key], TrainedEnsembleModelTemplateMixin]
     fetch1: Callable
 
+    @cached_property
+    def _dataset(self):
+        return self.dataset_table()
+
+    @cached_property
+    def _trained_model(self):
+        return self.trained_model_table()
+
     def create_ensemble(self, key: Key, comment: str = "") -> None:
-        if len(self.dataset_table() & key) != 1:
+        if len(self._dataset & key) != 1:
             raise ValueError("Provided key not sufficient to restrict dataset table to one entry!")
-        dataset_key = (self.dataset_table().proj() & key).fetch1()
-        models = (self.trained_model_table().proj() & key).fetch(as_dict=True)
+        dataset_key = (self._dataset.proj() & key).fetch1()
+        models = (self._trained_model.proj() & key).fetch(as_dict=True)
         primary_key = dict(dataset_key, ensemble_hash=integration.hash_list_of_dictionaries(models))
         self.insert1(dict(primary_key, ensemble_comment=comment))
-        self.Member().insert([{**primary_key, **m} for m in models])
+        bulk_insert(self.Member(), [{**primary_key, **m} for m in models])
 
     def load_model(self, key: Optional[Key] = None) -> Tuple[Dataloaders, EnsembleModel]:
         if key is None:
@@ -65,9 +92,10 @@ class TrainedEnsembleModelTemplateMixin:
     def _load_ensemble_model(self, key: Optional[Key] = None) -> Tuple[Dataloaders, EnsembleModel]:
         ensemble_key = (self & key).fetch1()
         model_keys = (self.Member() & ensemble_key).fetch(as_dict=True)
-        dataloaders, models = tuple(
-            list(x) for x in zip(*[self.trained_model_table().load_model(key=k) for k in model_keys])
-        )
+        trained_model = self._trained_model
+        with ThreadPoolExecutor(max_workers=max(1, min(len(model_keys), self.max_load_workers))) as executor:
+            loaded = list(executor.map(lambda k: trained_model.load_model(key=k), model_keys))
+        dataloaders, models = tuple(list(x) for x in zip(*loaded))
         return dataloaders[0], self.ensemble_model_class(*models)
 
 
@@ -90,14 +118,18 @@ class CSRFV1SelectorTemplateMixin:
     __and__: Callable[[Mapping], CSRFV1SelectorTemplateMixin]
     fetch1: Callable
 
+    @cached_property
+    def _dataset(self):
+        return self.dataset_table()
+
     @property
     def _key_source(self):
-        return self.dataset_table() & dict(dataset_fn=self.dataset_fn)
+        return self._dataset & dict(dataset_fn=self.dataset_fn)
 
     def make(self, key: Key, get_mappings: Callable = integration.get_mappings) -> None:
-        dataset_config = (self.dataset_table() & key).fetch1("dataset_config")
+        dataset_config = (self._dataset & key).fetch1("dataset_config")
         mappings = get_mappings(dataset_config, key)
-        self.insert(mappings)
+        bulk_insert(self, mappings)
 
     def get_output_selected_model(self, model: Module, key: Key) -> constrained_output_model:
         neuron_pos, session_id = (self & key).fetch1("neuron_position", "session_id")
@@ -121,12 +153,13 @@ class MEIMethodMixin:
 
     seed_table = None
     import_func = staticmethod(integration.import_module)
+    hash_func = staticmethod(make_hash)
 
     def add_method(self, method_fn: str, method_config: Mapping, comment: str = "") -> None:
         self.insert1(
             dict(
                 method_fn=method_fn,
-                method_hash=make_hash(method_config),
+                method_hash=self.hash_func(method_config),
                 method_config=method_config,
                 method_comment=comment,
             )
@@ -165,35 +198,60 @@ class MEITemplateMixin:
     seed_table = None
     model_loader_class = integration.ModelLoader
     save = staticmethod(torch.save)
+    compile_model = staticmethod(compile_model)
     get_temp_dir = tempfile.TemporaryDirectory
 
     insert1: Callable[[Mapping], None]
 
     def __init__(self, *args, cache_size_limit: int = 10, **kwargs):
         super().__init__(*args, **kwargs)
-        self.model_loader = self.model_loader_class(self.trained_model_table, cache_size_limit=cache_size_limit)
+        self.model_loader = self.model_loader_class(
+            self.trained_model_table, cache_size_limit=cache_size_limit, compile_model=self.compile_model
+        )
+
+    @cached_property
+    def _seed(self):
+        return self.seed_table()
+
+    @cached_property
+    def _selector(self):
+        return self.selector_table()
+
+    @cached_property
+    def _method(self):
+        return self.method_table()
 
     def make(self, key: Key) -> None:
         dataloaders, model = self.model_loader.load(key=key)
-        seed = (self.seed_table() & key).fetch1("mei_seed")
-        output_selected_model = self.selector_table().get_output_selected_model(model, key)
-        mei_entity = self.method_table().generate_mei(dataloaders, output_selected_model, key, seed)
+        seed = (self._seed & key).fetch1("mei_seed")
+        output_selected_model = self._selector.get_output_selected_model(model, key)
+        mei_entity = self._method.generate_mei(dataloaders, output_selected_model, key, seed)
         self._insert_mei(mei_entity)
 
     def _insert_mei(self, mei_entity: Dict[str, Any]) -> None:
         """Saves the MEI to a temporary directory and inserts the prepared entity into the table."""
+        items = [(name, mei_entity.pop(name)) for name in ("mei", "output")]
         with self.get_temp_dir() as temp_dir:
-            for name in ("mei", "output"):
-                self._save_to_disk(mei_entity, temp_dir, name)
+            mei_entity.update(self._save_batch(temp_dir, items))
             self.insert1(mei_entity)
 
-    def _save_to_disk(self, mei_entity: Dict[str, Any], temp_dir: str, name: str) -> None:
-        data = mei_entity.pop(name)
+    def _save_batch(self, temp_dir: str, items: Iterable[Tuple[str, Any]]) -> Dict[str, str]:
+        """Saves all items to the temporary directory and returns a mapping from their names to the created files."""
+        return {name: self._save_to_disk(temp_dir, name, data) for name, data in items}
+
+    def _save_to_disk(self, temp_dir: str, name: str, data: Any) -> str:
         filename = name + "_" + self._create_random_filename() + ".pth.tar"
         filepath = os.path.join(temp_dir, filename)
-        self.save(data, filepath)
-        mei_entity[name] = filepath
+        self.save(self._to_cpu(data), filepath, _use_new_zipfile_serialization=True)
+        return filepath
+
+    @staticmethod
+    def _to_cpu(data: Any) -> Any:
+        """Moves CUDA tensors to the CPU, all other data is returned unchanged."""
+        if isinstance(data, torch.Tensor) and data.is_cuda:
+            return data.detach().cpu()
+        return data
 
     @staticmethod
     def _create_random_filename(length: Optional[int] = 32) -> str:
-        return "".join(choice(ascii_letters) for _ in range(length))
+        return secrets.token_urlsafe(length)[:length]
@@ -1,6 +1,6 @@
 """This module contains PyTorch modules used in the MEI optimization process."""
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Iterator
 
 import torch
 from torch import Tensor
@@ -20,11 +20,13 @@ class EnsembleModel(Module):
         """Initializes EnsembleModel."""
         super().__init__()
         self.members = self._module_container_cls(members)
+        self._streams = dict()
 
-    def __call__(self, x: Tensor, *args, **kwargs) -> Tensor:
+    def forward(self, x: Tensor, *args, **kwargs) -> Tensor:
         """Calculates the forward pass through the ensemble.
 
-        The input is passed through all individual members of the ensemble and their outputs are averaged.
+        The input is passed through all individual members of the ensemble and their outputs are averaged. If the input
+        is a CUDA tensor, each member is run on its own CUDA stream so that the members can execute concurrently.
 
         Args:
             x: A tensor representing the input to the ensemble.
@@ -34,9 +36,48 @@ class EnsembleModel(Module):
         Returns:
             A tensor representing the ensemble's output.
         """
-        outputs = [m(x, *args, **kwargs) for m in self.members]
-        mean_output = torch.stack(outputs, dim=0).mean(dim=0)
-        return mean_output
+        if torch.cuda.is_available() and x.is_cuda:
+            return self._concurrent_forward(x, *args, **kwargs)
+        return self._average(member(x, *args, **kwargs) for member in self.members)
+
+    def _concurrent_forward(self, x: Tensor, *args, **kwargs) -> Tensor:
+        current_stream = torch.cuda.current_stream(x.device)
+        streams = self._get_streams(x.device)
+        outputs = []
+        for member, stream in zip(self.members, streams):
+            stream.wait_stream(current_stream)
+            with torch.cuda.stream(stream):
+                x.record_stream(stream)
+                outputs.append(member(x, *args, **kwargs))
+
+        def synchronized_outputs():
+            for member_output, stream in zip(outputs, streams):
+                current_stream.wait_stream(stream)
+                member_output.record_stream(current_stream)
+                yield member_output
+
+        return self._average(synchronized_outputs())
+
+    def _average(self, outputs: Iterator[Tensor]) -> Tensor:
+        """Averages the member outputs while only allocating a single buffer for the running sum.
+
+        The first addition is done out-of-place so that none of the member outputs is modified. All following additions
+        and the final division are done in-place on the resulting buffer which is safe for autograd because neither
+        addition nor division by a scalar need their inputs during the backward pass.
+        """
+        outputs = iter(outputs)
+        output = next(outputs)
+        for i, member_output in enumerate(outputs):
+            output = output + member_output if i == 0 else output.add_(member_output)
+        if len(self.members) == 1:
+            return output
+        return output.div_(len(self.members))
+
+    def _get_streams(self, device: torch.device) -> List[torch.cuda.Stream]:
+        """Returns one CUDA stream per ensemble member on the given device, creating them on first use."""
+        if device not in self._streams:
+            self._streams[device] = [torch.cuda.Stream(device=device) for _ in self.members]
+        return self._streams[device]
 
     def __repr__(self):
         return f"{self.__class__.__qualname__}({', '.join(m.__repr__() for m in self.members)})"
@@ -60,7 +101,7 @@ class ConstrainedOutputModel(Module):
         self.constraint = constraint
         self.forward_kwargs = forward_kwargs if forward_kwargs else dict()
 
-    def __call__(self, x: Tensor, *args, **kwargs) -> Tensor:
+    def forward(self, x: Tensor, *args, **kwargs) -> Tensor:
         """Computes the constrained output of the model.
 
         Args:
@@ -72,7 +113,7 @@ class ConstrainedOutputModel(Module):
             A tensor representing the constrained output of the model.
         """
         output = self.model(x, *args, **self.forward_kwargs, **kwargs)
-        return output[:, self.constraint]
+        return output.select(1, self.constraint)
 
     def __repr__(self):
         return f"{self.__class__.__qualname__}({self.model}, {self.constraint}, forward_kwargs={self.forward_kwargs})"
@@ -0,0 +1,21 @@
+from unittest.mock import MagicMock, call
+
+import pytest
+
+from mei import mixins
+
+
+@pytest.fixture
+def table():
+    return MagicMock(name="table")
+
+
+@pytest.mark.parametrize("n_rows,n_calls", [(0, 0), (1, 1), (3, 1), (4, 2), (9, 3)])
+def test_if_rows_are_inserted_in_chunks(table, n_rows, n_calls):
+    mixins.bulk_insert(table, range(n_rows), chunk_size=3)
+    assert table.insert.call_count == n_calls
+
+
+def test_if_all_rows_are_inserted(table):
+    mixins.bulk_insert(table, range(5), chunk_size=2)
+    table.insert.assert_has_calls([call([0, 1]), call([2, 3]), call([4])])
@@ -41,20 +41,26 @@ class TestMake:
 
     @pytest.fixture
     def get_mappings(self):
-        return MagicMock(return_value="mappings")
+        return MagicMock(return_value=["mapping1", "mapping2"])
 
     def test_if_dataset_config_is_correctly_fetched(self, key, selector_template, dataset_table, get_mappings):
         selector_template().make(key, get_mappings=get_mappings)
         dataset_table.return_value.__and__.assert_called_once_with(key)
         dataset_table.return_value.__and__.return_value.fetch1.assert_called_once_with("dataset_config")
 
+    def test_if_dataset_table_is_instantiated_once(self, key, selector_template, dataset_table, get_mappings):
+        selector = selector_template()
+        _ = selector._key_source
+        selector.make(key, get_mappings=get_mappings)
+        dataset_table.assert_called_once_with()
+
     def test_if_get_mappings_is_correctly_called(self, key, selector_template, get_mappings):
         selector_template().make(key, get_mappings=get_mappings)
         get_mappings.assert_called_once_with("dataset_config", key)
 
     def test_if_mappings_are_correctly_inserted(self, key, selector_template, insert, get_mappings):
         selector_template().make(key, get_mappings=get_mappings)
-        insert.assert_called_once_with("mappings")
+        insert.assert_called_once_with(["mapping1", "mapping2"])
 
 
 class TestGetOutputSelectedModel:
@@ -31,6 +31,14 @@ def test_that_method_is_correctly_inserted(mei_method, insert1):
     )
 
 
+def test_that_hash_func_is_used(mei_method, insert1):
+    mei_method.hash_func = MagicMock(name="hash_func", return_value="hash")
+    method_config = MagicMock(name="method_config")
+    mei_method().add_method("method_fn", method_config)
+    mei_method.hash_func.assert_called_once_with(method_config)
+    assert insert1.call_args[0][0]["method_hash"] == "hash"
+
+
 class TestGenerateMEI:
     @pytest.fixture
     def generate_mei(self, mei_method, dataloaders, model, seed):
@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock, call
 
 import pytest
+import torch
 
 from mei import mixins
 
@@ -30,19 +31,29 @@ def model_loader():
     return model_loader
 
 
+def test_if_model_is_not_compiled_by_default():
+    model = MagicMock(name="model")
+    assert mixins.compile_model(model) is model
+
+
 def test_if_model_loader_is_correctly_initialized(mei_template, trained_model_table, model_loader_class):
     mei_template(cache_size_limit=5)
-    model_loader_class.assert_called_once_with(trained_model_table, cache_size_limit=5)
+    model_loader_class.assert_called_once_with(
+        trained_model_table, cache_size_limit=5, compile_model=mei_template.compile_model
+    )
 
 
 class TestMake:
     @pytest.fixture
-    def mei_template(self, mei_template, selector_table, method_table, seed_table, insert1, save, model_loader_class):
+    def mei_template(
+        self, mei_template, selector_table, method_table, seed_table, insert1, save, compile_model, model_loader_class
+    ):
         mei_template.selector_table = selector_table
         mei_template.method_table = method_table
         mei_template.seed_table = seed_table
         mei_template.insert1 = insert1
         mei_template.save = save
+        mei_template.compile_model = compile_model
         mei_template.model_loader_class = model_loader_class
         get_temp_dir = MagicMock(name="get_temp_dir")
         get_temp_dir.return_value.__enter__.return_value = "/temp_dir"
@@ -74,6 +85,10 @@ class TestMake:
     def save(self):
         return MagicMock(name="save")
 
+    @pytest.fixture
+    def compile_model(self):
+        return MagicMock(name="compile_model", return_value="compiled_model")
+
     def test_if_model_is_correctly_loaded(self, key, mei_template, model_loader):
         mei_template().make(key)
         model_loader.load.assert_called_once_with(key=key)
@@ -87,6 +102,10 @@ class TestMake:
         seed_table.return_value.__and__.assert_called_once_with(key)
         seed_table.return_value.__and__.return_value.fetch1.assert_called_once_with("mei_seed")
 
+    def test_if_output_selected_model_is_not_compiled(self, key, mei_template, compile_model):
+        mei_template().make(key)
+        compile_model.assert_not_called()
+
     def test_if_mei_is_correctly_generated(self, key, mei_template, method_table):
         mei_template().make(key)
         method_table.return_value.generate_mei.assert_called_once_with(
@@ -96,8 +115,11 @@ class TestMake:
     def test_if_mei_is_correctly_saved(self, key, mei_template, save):
         mei_template().make(key)
         assert save.call_count == 2
-        save.has_calls(
-            call("mei", "/temp_dir/mei_filename1.pth.tar"), call("output", "/temp_dir/output_filename2.pth.tar")
+        save.assert_has_calls(
+            [
+                call("mei", "/temp_dir/mei_filename1.pth.tar", _use_new_zipfile_serialization=True),
+                call("output", "/temp_dir/output_filename2.pth.tar", _use_new_zipfile_serialization=True),
+            ]
         )
 
     def test_if_mei_entity_is_correctly_saved(self, key, mei_template, insert1):
@@ -105,3 +127,15 @@ class TestMake:
         insert1.assert_called_once_with(
             dict(mei="/temp_dir/mei_filename1.pth.tar", output="/temp_dir/output_filename2.pth.tar")
         )
+
+
+@pytest.mark.parametrize("data", ["mei", torch.zeros(2, 3)])
+def test_if_non_cuda_data_is_returned_unchanged(data):
+    assert mixins.MEITemplateMixin._to_cpu(data) is data
+
+
+def test_if_cuda_tensor_is_detached_and_moved_to_cpu():
+    data = MagicMock(name="data", spec=torch.Tensor)
+    data.is_cuda = True
+    assert mixins.MEITemplateMixin._to_cpu(data) is data.detach.return_value.cpu.return_value
+    data.detach.return_value.cpu.assert_called_once_with()
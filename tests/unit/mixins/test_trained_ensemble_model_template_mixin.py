@@ -110,7 +110,7 @@ class TestLoadModel:
     @pytest.fixture
     def trained_model_table(self, trained_model_table):
         trained_model_table.return_value.load_model = MagicMock(
-            side_effect=[("dataloaders1", "model1"), ("dataloaders2", "model2")]
+            side_effect=lambda key: ("dataloaders" + str(key["m"] + 1), "model" + str(key["m"] + 1))
         )
         return trained_model_table
 
@@ -153,6 +153,18 @@ class TestLoadModel:
             [call(key=dict(m=0, a=0)), call(key=dict(m=1, a=1))]
         )
 
+    @pytest.mark.parametrize("max_load_workers", [1, 2, 8])
+    def test_if_models_are_loaded_with_multiple_workers(
+        self, trained_ensemble_model_template, trained_model_table, ensemble_model_class, max_load_workers
+    ):
+        trained_ensemble_model_template.max_load_workers = max_load_workers
+        dataloaders, _ = trained_ensemble_model_template().load_model()
+        trained_model_table.return_value.load_model.assert_has_calls(
+            [call(key=dict(m=0, a=0)), call(key=dict(m=1, a=1))], any_order=True
+        )
+        ensemble_model_class.assert_called_once_with("model1", "model2")
+        assert dataloaders == "dataloaders1"
+
     def test_if_ensemble_model_is_correctly_initialized(self, trained_ensemble_model_template, ensemble_model_class):
         trained_ensemble_model_template().load_model()
         ensemble_model_class.assert_called_once_with("model1", "model2")
@@ -1,6 +1,11 @@
+import pickle
 from unittest.mock import Mock
 
+import numpy as np
 import pytest
+import torch
+
+from nnfabrik.utility.dj_helpers import make_hash
 
 from mei import integration
 
@@ -63,6 +68,77 @@ def test_get_mappings():
     ]
 
 
+def test_get_mappings_with_array_unit_indices():
+    dataset_config = dict(datafiles=["path0"])
+    data = dict(path0=dict(unit_indices=np.array([3, 7]), session_id="s0"))
+    mappings = integration.get_mappings(dataset_config, dict(attr1=0), get_fake_load_function(data))
+    assert mappings == [
+        dict(attr1=0, neuron_id=3, neuron_position=0, session_id="s0"),
+        dict(attr1=0, neuron_id=7, neuron_position=1, session_id="s0"),
+    ]
+    assert all(type(m["neuron_id"]) is int for m in mappings)
+
+
+class TestLoadPickledData:
+    @pytest.fixture
+    def data(self):
+        return dict(unit_indices=[0, 1, 2], session_id="s0")
+
+    def test_pickled_file(self, tmp_path, data):
+        path = tmp_path / "data.pkl"
+        with open(path, "wb") as datafile:
+            pickle.dump(data, datafile)
+        assert integration.load_pickled_data(path) == data
+
+    @pytest.mark.parametrize("protocol", [2, pickle.HIGHEST_PROTOCOL])
+    def test_pickled_file_with_array(self, tmp_path, data, protocol):
+        path = tmp_path / "data.pkl"
+        with open(path, "wb") as datafile:
+            pickle.dump(dict(data, unit_indices=np.array(data["unit_indices"])), datafile, protocol=protocol)
+        loaded = integration.load_pickled_data(path)
+        assert np.array_equal(loaded["unit_indices"], np.array([0, 1, 2]))
+
+    @pytest.mark.parametrize("protocol", [0, 1, 2, pickle.HIGHEST_PROTOCOL])
+    def test_pickled_file_with_builtin_containers(self, tmp_path, protocol):
+        data = dict(unit_indices={1, 2}, frozen=frozenset([3]), raw=bytearray(b"ab"), session_id="s0")
+        path = tmp_path / "data.pkl"
+        with open(path, "wb") as datafile:
+            pickle.dump(data, datafile, protocol=protocol)
+        assert integration.load_pickled_data(path) == data
+
+    def test_pickled_file_with_unsafe_python2_global(self, tmp_path):
+        path = tmp_path / "data.pkl"
+        path.write_bytes(b"c__builtin__\neval\n(S'1'\ntR.")
+        with pytest.raises(pickle.UnpicklingError):
+            integration.load_pickled_data(path)
+
+    @pytest.mark.parametrize("protocol", [0, 2, pickle.HIGHEST_PROTOCOL])
+    def test_pickled_file_with_unsafe_global(self, tmp_path, data, protocol):
+        path = tmp_path / "data.pkl"
+        with open(path, "wb") as datafile:
+            pickle.dump(dict(data, obj=FakeMemberTable()), datafile, protocol=protocol)
+        with pytest.raises(pickle.UnpicklingError):
+            integration.load_pickled_data(path)
+
+    def test_torch_file(self, tmp_path, data):
+        path = tmp_path / "data.pth"
+        torch.save(
+            dict(data, unit_indices=torch.tensor(data["unit_indices"])), path, _use_new_zipfile_serialization=True
+        )
+        loaded = integration.load_pickled_data(path)
+        assert loaded["session_id"] == "s0"
+        assert torch.equal(loaded["unit_indices"], torch.tensor([0, 1, 2]))
+
+    def test_torch_file_without_weights_only_support(self, tmp_path, data, monkeypatch):
+        monkeypatch.setattr(integration, "_TORCH_LOAD_KWARGS", dict(map_location="cpu"))
+        load = Mock(name="load", return_value="loaded")
+        monkeypatch.setattr(integration.torch, "load", load)
+        path = tmp_path / "data.pth"
+        torch.save(data, path, _use_new_zipfile_serialization=True)
+        assert integration.load_pickled_data(path) == "loaded"
+        assert load.call_args[1] == dict(map_location="cpu")
+
+
 def fake_get_dims(dataloaders):
     return dataloaders
 
@@ -91,6 +167,31 @@ class TestModelLoader:
         model = model_loader.load(dict(trained_model_attr=0))
         assert model is not first_model
 
+    def test_model_is_compiled_once_when_cached(self, fake_trained_model_table):
+        compile_model = Mock(name="compile_model", side_effect=lambda model: ("compiled", model))
+        model_loader = integration.ModelLoader(
+            fake_trained_model_table(primary_key=["trained_model_attr"]), compile_model=compile_model
+        )
+        dataloaders, model = model_loader.load(dict(trained_model_attr=0))
+        assert model_loader.load(dict(trained_model_attr=0)) == (dataloaders, model)
+        assert dataloaders == "dataloaders0" and model[0] == "compiled"
+        compile_model.assert_called_once()
+
+    def test_key_hash_matches_make_hash_for_equal_values_of_different_types(self, fake_trained_model_table):
+        model_loader = integration.ModelLoader(fake_trained_model_table(primary_key=["trained_model_attr"]))
+        for value in (1, 1.0, True):
+            key = dict(trained_model_attr=value, other_attr=0)
+            assert model_loader._hash_trained_model_key(key) == make_hash(dict(trained_model_attr=value))
+
+    def test_least_recently_used_model_is_evicted(self, fake_trained_model_table):
+        model_loader = integration.ModelLoader(fake_trained_model_table(primary_key=["trained_model_attr"]), 2)
+        first_model = model_loader.load(dict(trained_model_attr=0))
+        second_model = model_loader.load(dict(trained_model_attr=1))
+        model_loader.load(dict(trained_model_attr=0))
+        model_loader.load(dict(trained_model_attr=2))
+        assert model_loader.load(dict(trained_model_attr=0)) is first_model
+        assert model_loader.load(dict(trained_model_attr=1)) is not second_model
+
 
 class TestHashListOfDictionaries:
     def test_output_format(self):
@@ -116,3 +217,31 @@ class TestHashListOfDictionaries:
         list_of_dicts1 = [dict(a=3, b=5), dict(a=1, b=2), dict(a=2, b=8)]
         list_of_dicts2 = [dict(a=1, b=2), dict(a=3, b=5), dict(a=2, b=8)]
         assert self.hash_and_compare(list_of_dicts1, list_of_dicts2)
+
+    def test_duplicates_are_not_dropped(self):
+        list_of_dicts1 = [dict(a=1, b=2), dict(a=1, b=2)]
+        list_of_dicts2 = [dict(a=1, b=2)]
+        assert not self.hash_and_compare(list_of_dicts1, list_of_dicts2)
+
+
+class TestFastConfigHash:
+    def test_output_format(self):
+        hashed = integration.fast_config_hash(dict(a=1, b=dict(c=[1, 2])))
+        assert isinstance(hashed, str) and len(hashed) == 32
+
+    def test_invariance_to_dictionary_key_order(self):
+        hashed1 = integration.fast_config_hash(dict(a=1, b=dict(c=2, d=3)))
+        hashed2 = integration.fast_config_hash(dict(b=dict(d=3, c=2), a=1))
+        assert hashed1 == hashed2
+
+    def test_different_configs(self):
+        assert integration.fast_config_hash(dict(a=1)) != integration.fast_config_hash(dict(a=2))
+
+    @pytest.mark.parametrize("value", [np.zeros(2000), torch.zeros(2000), object()])
+    def test_not_serializable_values_are_rejected(self, value):
+        with pytest.raises(TypeError):
+            integration.fast_config_hash(dict(a=value))
+
+    def test_mixed_type_keys_are_rejected(self):
+        with pytest.raises(TypeError):
+            integration.fast_config_hash({1: "a", "b": 2})
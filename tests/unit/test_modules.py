@@ -1,4 +1,5 @@
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, call
+from contextlib import contextmanager
 from typing import Type
 
 import pytest
@@ -75,10 +76,134 @@ class TestEnsembleModel:
         output = ensemble_model(ensemble_input)
         assert torch.allclose(output, torch.tensor([4, 5, 6], dtype=torch.float))
 
+    def test_if_outputs_of_ensemble_members_are_not_modified(self, ensemble_model, members, ensemble_input):
+        expected = [m.return_value.clone() for m in members]
+        ensemble_model(ensemble_input)
+        for member, output in zip(members, expected):
+            assert torch.equal(member.return_value, output)
+
+    @pytest.mark.parametrize("n_members", [1, 2, 3])
+    def test_if_gradients_flow_through_ensemble(self, monkeypatch, n_members):
+        monkeypatch.setattr(modules.EnsembleModel, "_module_container_cls", ModuleList)
+        torch.manual_seed(0)
+        members = [torch.nn.Sequential(torch.nn.Linear(4, 3), torch.nn.Sigmoid()) for _ in range(n_members)]
+        x = torch.randn(2, 4, requires_grad=True)
+        modules.EnsembleModel(*members)(x).sum().backward()
+        expected_x = x.detach().clone().requires_grad_()
+        (sum(m(expected_x) for m in members) / n_members).sum().backward()
+        assert torch.allclose(x.grad, expected_x.grad)
+
     def test_repr(self, ensemble_model):
         assert str(ensemble_model) == "EnsembleModel(member1, member2, member3)"
 
 
+class TestEnsembleModelConcurrentForward:
+    @pytest.fixture
+    def cuda(self, monkeypatch, streams, current_stream):
+        cuda = MagicMock(name="cuda")
+        cuda.active_stream = current_stream
+
+        @contextmanager
+        def stream_context(stream):
+            previous_stream, cuda.active_stream = cuda.active_stream, stream
+            yield
+            cuda.active_stream = previous_stream
+
+        monkeypatch.setattr(torch.cuda, "is_available", lambda: True)
+        monkeypatch.setattr(torch.cuda, "current_stream", MagicMock(return_value=current_stream))
+        monkeypatch.setattr(torch.cuda, "Stream", MagicMock(side_effect=streams))
+        monkeypatch.setattr(torch.cuda, "stream", stream_context)
+        return cuda
+
+    @pytest.fixture
+    def streams(self):
+        return [MagicMock(name="stream" + str(i + 1)) for i in range(3)]
+
+    @pytest.fixture
+    def current_stream(self):
+        return MagicMock(name="current_stream")
+
+    @pytest.fixture
+    def member_outputs(self):
+        return [MagicMock(name="output" + str(i + 1)) for i in range(3)]
+
+    @pytest.fixture
+    def members(self, cuda, member_outputs):
+        def create_member(i):
+            def forward(x):
+                member_outputs[i].stream = cuda.active_stream
+                return member_outputs[i]
+
+            return MagicMock(name="member" + str(i + 1), side_effect=forward)
+
+        return [create_member(i) for i in range(3)]
+
+    @pytest.fixture
+    def ensemble_model(self, monkeypatch, members):
+        monkeypatch.setattr(modules.EnsembleModel, "_module_container_cls", list)
+        return modules.EnsembleModel(*members)
+
+    @pytest.fixture
+    def ensemble_input(self):
+        ensemble_input = MagicMock(name="ensemble_input", spec=Tensor)
+        ensemble_input.is_cuda = True
+        ensemble_input.device = "cuda:0"
+        return ensemble_input
+
+    def test_if_one_stream_per_member_is_created_once(self, ensemble_model, ensemble_input):
+        ensemble_model(ensemble_input)
+        ensemble_model(ensemble_input)
+        assert torch.cuda.Stream.call_args_list == [call(device="cuda:0")] * 3
+
+    def test_if_member_streams_wait_on_current_stream(self, ensemble_model, ensemble_input, streams, current_stream):
+        ensemble_model(ensemble_input)
+        for stream in streams:
+            stream.wait_stream.assert_called_once_with(current_stream)
+
+    def test_if_members_run_on_their_own_stream(self, ensemble_model, ensemble_input, member_outputs, streams):
+        ensemble_model(ensemble_input)
+        assert [output.stream for output in member_outputs] == streams
+        assert ensemble_input.record_stream.call_args_list == [call(s) for s in streams]
+
+    def test_if_current_stream_waits_on_each_member_stream(
+        self, ensemble_model, ensemble_input, streams, current_stream
+    ):
+        ensemble_model(ensemble_input)
+        assert current_stream.wait_stream.call_args_list == [call(s) for s in streams]
+
+    def test_if_member_outputs_are_recorded_on_current_stream(
+        self, ensemble_model, ensemble_input, member_outputs, current_stream
+    ):
+        ensemble_model(ensemble_input)
+        for output in member_outputs:
+            output.record_stream.assert_called_once_with(current_stream)
+
+    def test_if_outputs_are_averaged_in_member_order(self, ensemble_model, ensemble_input, member_outputs):
+        output = ensemble_model(ensemble_input)
+        first_output, second_output, third_output = member_outputs
+        first_output.__add__.assert_called_once_with(second_output)
+        running_sum = first_output.__add__.return_value
+        running_sum.add_.assert_called_once_with(third_output)
+        running_sum.add_.return_value.div_.assert_called_once_with(3)
+        assert output is running_sum.add_.return_value.div_.return_value
+
+    @pytest.mark.skipif(not torch.cuda.is_available(), reason="requires a CUDA device")
+    def test_if_cuda_output_and_gradient_match_sequential_cpu_path(self, monkeypatch):
+        monkeypatch.setattr(modules.EnsembleModel, "_module_container_cls", ModuleList)
+        torch.manual_seed(0)
+        ensemble_model = modules.EnsembleModel(*(torch.nn.Linear(16, 8) for _ in range(3)))
+        cpu_input = torch.randn(4, 16, requires_grad=True)
+        cpu_output = ensemble_model(cpu_input)
+        cpu_output.sum().backward()
+        ensemble_model.cuda()
+        cuda_input = cpu_input.detach().cuda().requires_grad_()
+        cuda_output = ensemble_model(cuda_input)
+        cuda_output.sum().backward()
+        torch.cuda.synchronize()
+        assert torch.allclose(cuda_output.cpu(), cpu_output, atol=1e-5)
+        assert torch.allclose(cuda_input.grad.cpu(), cpu_input.grad, atol=1e-5)
+
+
 class TestConstrainedOutputModel:
     @pytest.fixture
     def model(self):
@@ -116,6 +241,17 @@ class TestConstrainedOutputModel:
         constrained_model(model_input)
         model.assert_called_once_with(model_input, forward_kwarg="forward_kwarg")
 
+    def test_if_changed_forward_kwargs_are_passed_to_model(self, model, model_input):
+        constrained_model = modules.ConstrainedOutputModel(model, 0, forward_kwargs=dict(forward_kwarg="old"))
+        constrained_model.forward_kwargs["forward_kwarg"] = "new"
+        constrained_model(model_input)
+        model.assert_called_once_with(model_input, forward_kwarg="new")
+
+    def test_if_forward_kwargs_can_not_be_overwritten_at_call_time(self, model, model_input):
+        constrained_model = modules.ConstrainedOutputModel(model, 0, forward_kwargs=dict(forward_kwarg="forward_kwarg"))
+        with pytest.raises(TypeError):
+            constrained_model(model_input, forward_kwarg="other")
+
     def test_repr(self, model):
         constrained_model = modules.ConstrainedOutputModel(model, 0, forward_kwargs=dict(kwarg="kwarg"))
         assert str(constrained_model) == "ConstrainedOutputModel(model, 0, forward_kwargs={'kwarg': 'kwarg'})"